@@ -1,16 +1,23 @@
+import contextlib
 import logging
+import queue
+import threading
 import tkinter as tk
 import traceback
-from collections.abc import Iterable
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
 from tkinter import messagebox, ttk
 
 from ez_reset.d4 import D4ControlBackend
 from ez_reset.devices import by_model
 from ez_reset.printer import Printer
-from ez_reset.status import InkColor, InkLevel
+from ez_reset.status import InkColor, InkLevel, Status
 from ez_reset.utils import parse_identifier
 from ez_reset.win_usbprint import USBPRINTTransport, enumerate_printers
 
+# how often the Tk thread checks for finished printer I/O
+POLL_INTERVAL_MS = 50
+
 
 class PrinterList(ttk.Frame):
     def __init__(self, master: tk.Misc) -> None:
@@ -35,36 +42,85 @@ class PrinterList(ttk.Frame):
     def open_printer(self, _event: tk.Event) -> None:
         selected_index = self.list.curselection()[0]
 
-        usb_transport = USBPRINTTransport(self._printers[selected_index]).__enter__()
-        backend = D4ControlBackend(usb_transport).__enter__()
+        usb_transport = USBPRINTTransport(self._printers[selected_index])
+        backend = D4ControlBackend(usb_transport)
+
+        # every bit of printer I/O, from opening to closing, runs on this one worker thread: overlapped reads belong
+        # to the thread that posted them and are cancelled when it exits
+        executor = ThreadPoolExecutor(max_workers=1)
+        exits = contextlib.ExitStack()
+
+        def open_device() -> str:
+            # a failed open unwinds whatever was already entered
+            with contextlib.ExitStack() as opening:
+                opening.enter_context(usb_transport)
+                opening.enter_context(backend)
+                identifier = backend.identify()
+
+                exits.push(opening.pop_all())
+
+            return identifier
+
+        def opened(future: Future[str]) -> None:
+            root.config(cursor="")
+
+            try:
+                identifier = parse_identifier(future.result())
+                device = by_model(identifier["MDL"])
+            except BaseException:
+                executor.submit(exits.close)
+                executor.shutdown(wait=False)
+                raise
+
+            window = tk.Toplevel()
+            window.minsize(200, 300)
+
+            def on_closing() -> None:
+                info.close(exits.close)
+                window.destroy()
+
+            window.protocol("WM_DELETE_WINDOW", on_closing)
 
-        window = tk.Toplevel()
-        window.minsize(200, 300)
+            window.title(identifier["DES"])
 
-        def on_closing() -> None:
-            backend.__exit__(None, None, None)
-            usb_transport.__exit__(None, None, None)
-            window.destroy()
+            printer = Printer(backend, device=device)
 
-        window.protocol("WM_DELETE_WINDOW", on_closing)
+            info = PrinterInfo(window, printer, executor)
+            info.pack(fill=tk.BOTH, expand=True)
 
-        identifier = parse_identifier(backend.identify())
-        window.title(identifier["DES"])
+        # the D4 handshake takes a while, so wait for it without blocking the mainloop
+        root.config(cursor="watch")
+        self._when_done(executor.submit(open_device), opened)
 
-        device = by_model(identifier["MDL"])
+    def _when_done(self, future: Future[str], done: Callable[[Future[str]], None]) -> None:
+        if future.done():
+            done(future)
+        else:
+            self.after(POLL_INTERVAL_MS, self._when_done, future, done)
 
-        printer = Printer(backend, device=device)
 
-        info = PrinterInfo(window, printer)
-        info.pack(fill=tk.BOTH, expand=True)
+type Readings = tuple[Status, list[tuple[int, int]]]
 
 
 class PrinterInfo(ttk.Frame):
-    def __init__(self, master: tk.Misc, printer: Printer) -> None:
+    def __init__(self, master: tk.Misc, printer: Printer, executor: ThreadPoolExecutor) -> None:
         ttk.Frame.__init__(self, master)
 
         self.printer = printer
 
+        # printer I/O runs on a worker thread so the Tk mainloop keeps painting; the lock guards the D4 channel
+        # state, which is not reentrant
+        self._executor = executor
+        self._lock = threading.Lock()
+
+        # Tk must only be called from its own thread, so finished work is handed back through a queue that the
+        # mainloop polls
+        self._pending: set[Future[Readings]] = set()
+        self._results: queue.SimpleQueue[tuple[Callable[[Future[Readings]], None], Future[Readings]]] = (
+            queue.SimpleQueue()
+        )
+        self._poll_id: str | None = None
+
         self.style = ttk.Style(master)
 
         self.levels_frame = ttk.LabelFrame(self, text="Ink Levels")
@@ -88,16 +144,66 @@ class PrinterInfo(ttk.Frame):
 
         self.update_status()
 
-    def update_status(self) -> None:
+    def close(self, close_device: Callable[[], None]) -> None:
+        """Drop queued work and close the device on the worker thread, without waiting for it."""
+        if self._poll_id is not None:
+            self.after_cancel(self._poll_id)
+            self._poll_id = None
+
+        for future in self._pending:
+            future.cancel()
+        self._pending.clear()
+
+        root.config(cursor="")
+
+        self._executor.submit(close_device)
+        self._executor.shutdown(wait=False)
+
+    def _submit(self, work: Callable[[], Readings], done: Callable[[Future[Readings]], None]) -> None:
         root.config(cursor="watch")
-        root.update()
 
-        status = self.printer.get_status()
-        wastes = self.printer.get_waste()
+        future = self._executor.submit(work)
+        self._pending.add(future)
+        future.add_done_callback(lambda f: self._results.put((done, f)))
+
+        if self._poll_id is None:
+            self._poll_id = self.after(POLL_INTERVAL_MS, self._poll)
+
+    def _poll(self) -> None:
+        self._poll_id = None
+
+        try:
+            done, future = self._results.get_nowait()
+        except queue.Empty:
+            done = None
+        else:
+            self._pending.discard(future)
+
+        # reschedule before handing over the result, so a `done` that raises doesn't stop later results arriving
+        if self._pending or not self._results.empty():
+            self._poll_id = self.after(POLL_INTERVAL_MS, self._poll)
+
+        if done is not None:
+            done(future)
+
+    def _fetch(self) -> Readings:
+        with self._lock:
+            return self.printer.get_status(), self.printer.get_waste()
+
+    def _apply(self, future: Future[Readings]) -> None:
+        # other work, eg. a reset queued behind a refresh, may still be running
+        if not self._pending:
+            root.config(cursor="")
+
+        if not self.winfo_exists():
+            return
+
+        status, wastes = future.result()
         self.update_levels(status.levels)
         self.update_waste(wastes)
 
-        root.config(cursor="")
+    def update_status(self) -> None:
+        self._submit(self._fetch, self._apply)
 
     def update_levels(self, levels: Iterable[InkLevel]) -> None:
         for i, level in enumerate(levels):
@@ -125,16 +231,23 @@ class PrinterInfo(ttk.Frame):
             self.waste[i].update_level(level)
             self.waste[i].pack(fill="x", padx=2, pady=2)
 
-    def reset_waste(self) -> None:
-        self.printer.reset_waste()
+    def _reset(self) -> Readings:
+        with self._lock:
+            self.printer.reset_waste()
 
-        self.update_status()
+        return self._fetch()
+
+    def _apply_reset(self, future: Future[Readings]) -> None:
+        self._apply(future)
 
         messagebox.showinfo(
             "Restart printer",
             "Waste ink counters have been reset. You must now restart the printer.",
         )
 
+    def reset_waste(self) -> None:
+        self._submit(self._reset, self._apply_reset)
+
 
 class Level(ttk.Frame):
     def __init__(self, master: tk.Misc, color: str, level: int) -> None:
@@ -157,12 +270,19 @@ class Level(ttk.Frame):
         )
         self.label = ttk.Label(self, text="", anchor="center")
 
+        self._last_value: int | None = None
         self.update_level(level)
 
         self.gauge.pack(side="top", fill="x")
         self.label.pack(side="bottom", fill="x")
 
     def update_level(self, level: int) -> None:
+        # every widget option write is a Tcl round-trip and a redraw, so skip refreshes that change nothing
+        if level == self._last_value:
+            return
+
+        self._last_value = level
+
         self.gauge["value"] = level
         self.label["text"] = f"{level}%"
 
@@ -184,11 +304,19 @@ class Waste(ttk.Frame):
         self.gauge.grid(row=1, column=0, sticky="NSWE", columnspan=2)
         self.amount.grid(row=0, column=1)
 
+        self._last_value: float | None = None
         self.update_level(level)
 
     def update_level(self, level: int) -> None:
-        self.gauge["value"] = (level / self.max) * 100
-        self.amount["text"] = f"{level / self.max * 100: 0.2f}%"
+        # compare at the displayed precision
+        percentage = round(level / self.max * 100, 2)
+        if percentage == self._last_value:
+            return
+
+        self._last_value = percentage
+
+        self.gauge["value"] = percentage
+        self.amount["text"] = f"{percentage: 0.2f}%"
 
 
 logging.basicConfig(level=logging.INFO)
@@ -4,6 +4,7 @@ import binascii
 import logging
 import struct
 import time
+from collections import deque
 from dataclasses import dataclass
 from enum import IntEnum
 from types import TracebackType
@@ -14,14 +15,32 @@ from ez_reset.transport import Transport
 
 logger = logging.getLogger(__name__)
 
+_HEADER = struct.Struct(">BBHBB")
+_OPEN_CHANNEL_REQ = struct.Struct(">BBHHHH")
+_OPEN_CHANNEL_RES = struct.Struct(">BBHHH")
+_CHANNEL = struct.Struct(">BB")
+_CREDIT = struct.Struct(">BBH")
 
-@dataclass(frozen=True)
+
+class _Hex:
+    """Defer hex-dumping a buffer until a log record is actually formatted."""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+
+    def __str__(self) -> str:
+        return self.data[:0x100].hex(" ")
+
+
+@dataclass(frozen=True, slots=True)
 class D4Packet:
     psid: int
     ssid: int
     credit: int
     control: int
-    payload: bytes
+    payload: bytes | memoryview
 
 
 class D4Command(IntEnum):
@@ -34,6 +53,8 @@ class D4Command(IntEnum):
     GetSocketID = 9
 
 
+_REPLY_OF = {command: command | 0x80 for command in D4Command}
+
 errors = {
     0x80: "Malformed packet",
     0x81: "No credit",
@@ -60,7 +81,7 @@ class D4Channel:
 
         self.rx_credits: int = 0
         self.rx_credits_max: int = 0x0001
-        self.rx_queue: list[D4Packet] = []
+        self.rx_queue: deque[D4Packet] = deque()
 
     def __enter__(self) -> Self:
         self.d4.OpenChannel(self)
@@ -80,28 +101,49 @@ class D4Channel:
         return False
 
     def _ensure_credit(self) -> None:
-        if self.tx_credits < 1:
-            while self.d4.CreditRequest(self) < 1:
-                time.sleep(0.1)
+        # a busy printer can hold on to credit for a long time, so wait for it indefinitely
+        delay = 0.001
+        while self.tx_credits < 1:
+            # the reply is read through read_next_packet, so credit piggybacked on any packet that arrives for this
+            # channel in the meantime is picked up as well
+            if self.d4.CreditRequest(self) > 0 or self.tx_credits > 0:
+                return
+
+            time.sleep(delay)
+            delay = min(delay * 2, 0.1)
 
     def write(self, data: bytes, progress=None) -> None:
-        while len(data):
+        # packets are queued up to the size of the credit window and submitted in a single transport write
+        burst_size = 0
+
+        view = memoryview(data)
+        offset = 0
+        while offset < len(view):
             control = 0
 
-            payload = data[: self.mtu - 6] if len(data) > self.mtu - 6 else data
+            payload = view[offset : offset + self.mtu - 6]
             control |= 2
 
-            data = data[len(payload) :]
+            offset += len(payload)
 
             credit = min(self.rx_credits_max - self.rx_credits, 0xFF)
             packet = D4Packet(self.psid, self.ssid, credit, control, payload)
             self.rx_credits += credit
 
-            self._ensure_credit()
-            self.d4.write_packet(self, packet)
+            if self.tx_credits < 1 or not self.d4.can_queue(packet):
+                self.d4.flush()
+                if progress and burst_size:
+                    progress(burst_size)
+
+                burst_size = 0
+                self._ensure_credit()
 
-            if progress:
-                progress(len(payload))
+            self.d4.queue_packet(self, packet)
+            burst_size += len(payload)
+
+        self.d4.flush()
+        if progress and burst_size:
+            progress(burst_size)
 
     def read(self) -> D4Packet:
         credit = self.rx_credits_max - self.rx_credits
@@ -117,8 +159,15 @@ class D4:
     def __init__(self, transport: Transport) -> None:
         self.transport = transport
 
-        self.open_channels: dict[int, D4Channel] = {0x00: D4Channel(self, 0x00)}
-        self.open_channels[0x00].tx_credits = 1
+        self._ctrl = D4Channel(self, 0x00)
+        self._ctrl.tx_credits = 1
+
+        self.open_channels: dict[int, D4Channel] = {0x00: self._ctrl}
+
+        # outgoing packets are serialized into one reusable buffer and submitted together by flush()
+        self._tx_buf = bytearray(0x10000)
+        self._tx_view = memoryview(self._tx_buf)
+        self._tx_len = 0
 
         # drain eg. periodic status messages that may be queued
         self.transport.drain()
@@ -137,36 +186,58 @@ class D4:
         msg = "No free PSIDs to allocate to channel open."
         raise D4Error(msg)
 
-    def write_packet(self, channel: D4Channel, packet: D4Packet) -> None:
-        length = 6 + len(packet.payload)
-        header = struct.pack(
-            ">BBHBB",
+    def can_queue(self, packet: D4Packet) -> bool:
+        return self._tx_len + 6 + len(packet.payload) <= len(self._tx_buf)
+
+    def queue_packet(self, channel: D4Channel, packet: D4Packet) -> None:
+        """Serialize a packet into the transmit buffer, taking a credit from `channel`."""
+        start = self._tx_len
+        end = start + 6 + len(packet.payload)
+
+        _HEADER.pack_into(
+            self._tx_buf,
+            start,
             packet.psid,
             packet.ssid,
-            length,
+            end - start,
             packet.credit,
             packet.control,
         )
+        self._tx_view[start + 6 : end] = packet.payload
+        self._tx_len = end
 
-        data = header + packet.payload
-        logger.debug("> %s", " ".join(f"{x:02x}" for x in data[:0x100]))
-        self.transport.write(data)
+        # copy: the transmit buffer is reused, and a buffering handler may only format the record later
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("> %s", _Hex(bytes(self._tx_view[start:end])))
 
         channel.tx_credits -= 1
 
+    def flush(self) -> None:
+        if not self._tx_len:
+            return
+
+        self.transport.write(self._tx_view[: self._tx_len])
+        self._tx_len = 0
+
+    def write_packet(self, channel: D4Channel, packet: D4Packet) -> None:
+        self.queue_packet(channel, packet)
+        self.flush()
+
     def read_packet(self, channel: D4Channel) -> D4Packet:
         while not len(channel.rx_queue):
             self.read_next_packet()
 
-        return channel.rx_queue.pop(0)
+        return channel.rx_queue.popleft()
 
     def read_next_packet(self) -> None:
-        header_data = self.transport.read(6)
-        psid, ssid, length, credit, control = struct.unpack(">BBHBB", header_data)
-        logger.debug("< %s", " ".join(f"{x:02x}" for x in header_data))
+        read = self.transport.read
+
+        header_data = read(6)
+        psid, ssid, length, credit, control = _HEADER.unpack(header_data)
+        logger.debug("< %s", _Hex(header_data))
 
-        payload = self.transport.read(length - 6)
-        logger.debug("< %s", " ".join(f"{x:02x}" for x in header_data + payload))
+        payload = read(length - 6)
+        logger.debug("< %s %s", _Hex(header_data), _Hex(payload))
 
         if psid not in self.open_channels:
             logger.warning("Received packet for closed socket ID %d", psid)
@@ -180,25 +251,24 @@ class D4:
         channel.rx_queue.append(D4Packet(psid, ssid, credit, control, payload))
 
     def command(self, command: D4Command, payload: bytes = b"") -> bytes:
-        if command not in [command.Init, command.Exit]:
-            assert self.open_channels[0].tx_credits
+        assert command in {D4Command.Init, D4Command.Exit} or self._ctrl.tx_credits
 
         logger.debug("%s %s", command.name, binascii.hexlify(payload))
 
         packet = D4Packet(0x00, 0x00, 1, 0x00, bytes([command]) + payload)
 
-        self.write_packet(self.open_channels[0x00], packet)
-        res = self.read_packet(self.open_channels[0x00])
+        self.write_packet(self._ctrl, packet)
+        reply = self.read_packet(self._ctrl).payload
 
-        assert res.psid == 0
+        if reply[0] != _REPLY_OF[command] or reply[1] != 0:
+            if reply[0] == 0x7F:  # Error
+                msg = errors.get(reply[3], f"0x{reply[3]:x}")
+                raise D4Error(msg)
 
-        if res.payload[0] == 0x7F:  # Error
-            logger.error(errors.get(res.payload[3], f"0x{res.payload[3]:x}"))
+            msg = f"Bad reply to {command.name}: {_Hex(reply)}"
+            raise D4Error(msg)
 
-        assert res.payload[0] == command | 0x80
-        assert res.payload[1] == 0
-
-        return res.payload[2:]
+        return reply[2:]
 
     def Init(self) -> None:
         resp = self.command(D4Command.Init, b"\x10")
@@ -214,8 +284,7 @@ class D4:
     def OpenChannel(self, channel: D4Channel) -> None:
         psid = channel.ssid
 
-        req = struct.pack(
-            ">BBHHHH",
+        req = _OPEN_CHANNEL_REQ.pack(
             psid,
             channel.ssid,
             0xFFFF,
@@ -225,7 +294,7 @@ class D4:
         )
 
         res = self.command(D4Command.OpenChannel, req)
-        psid, ssid, mtu, _max_credit, credit = struct.unpack(">BBHHH", res)
+        psid, ssid, mtu, _max_credit, credit = _OPEN_CHANNEL_RES.unpack(res)
 
         assert ssid == channel.ssid
 
@@ -236,19 +305,19 @@ class D4:
         self.open_channels[psid] = channel
 
     def CloseChannel(self, channel: D4Channel) -> None:
-        req = struct.pack(">BB", channel.psid, channel.ssid)
+        req = _CHANNEL.pack(channel.psid, channel.ssid)
         self.command(D4Command.CloseChannel, req)
 
         del self.open_channels[channel.psid]
 
     def Credit(self, channel: D4Channel, amount: int) -> None:
-        req = struct.pack(">BBH", channel.psid, channel.ssid, amount)
+        req = _CREDIT.pack(channel.psid, channel.ssid, amount)
         self.command(D4Command.Credit, req)
 
     def CreditRequest(self, channel: D4Channel, amount: int = 0xFFFF) -> int:
-        req = struct.pack(">BBH", channel.psid, channel.ssid, amount)
+        req = _CREDIT.pack(channel.psid, channel.ssid, amount)
         resp = self.command(D4Command.CreditRequest, req)
-        _, _, amount = struct.unpack(">BBH", resp)
+        _, _, amount = _CREDIT.unpack(resp)
         self.open_channels[channel.psid].tx_credits += amount
         return amount
 
@@ -263,6 +332,8 @@ class D4ControlBackend(ControlBackend):
         self.d4: D4 | None = None
         self.channel: D4Channel | None = None
 
+        self._identifier: str | None = None
+
     def __enter__(self) -> Self:
         self.d4 = D4(self.transport)
         self.channel = self.d4.channel("EPSON-CTRL").__enter__()
@@ -276,6 +347,7 @@ class D4ControlBackend(ControlBackend):
         exc_tb: TracebackType | None,
     ) -> bool:
         self.channel.__exit__(exc_type, exc_val, exc_tb)
+        self._identifier = None
 
         return False
 
@@ -290,4 +362,7 @@ class D4ControlBackend(ControlBackend):
         return res.payload
 
     def identify(self) -> str:
-        return self.transport.identify()
+        if self._identifier is None:
+            self._identifier = self.transport.identify()
+
+        return self._identifier
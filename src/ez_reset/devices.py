@@ -1,7 +1,10 @@
 import xml.etree.ElementTree as ET
+from collections.abc import Mapping
 from dataclasses import dataclass
+from functools import cache
 from importlib.resources import files
 from itertools import batched
+from types import MappingProxyType
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -10,64 +13,90 @@ if TYPE_CHECKING:
 xml_content = files(__package__).joinpath("devices.xml").read_bytes()
 devices = ET.fromstring(xml_content)
 
+# index the static tree once so lookups don't walk it with XPath on every call
+_printers: dict[str, "Element"] = {}
+for _printer_el in devices.iterfind(".//printer"):
+    _printers.setdefault(_printer_el.attrib["model"], _printer_el)
 
-@dataclass
+_specs: dict[str, "Element"] = {}
+for _spec_el in devices.iterfind(".//devices/*"):
+    _specs.setdefault(_spec_el.tag, _spec_el)
+
+
+@dataclass(frozen=True, slots=True)
 class Counter:
-    addresses: list[int]
+    addresses: tuple[int, ...]
     max: int
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Device:
     model: bytes
     key: bytes
 
-    counters: list[Counter]
+    counters: tuple[Counter, ...]
+
+    reset: Mapping[int, int]
 
-    reset: dict[int, int]
+    # whether the service mode accepts several EEPROM writes in one command
+    bulk_reset: bool = False
 
 
+# every caller gets the same cached Device, which is why it and its fields are immutable
+@cache
 def by_model(model: str) -> Device:
-    printer_el: Element = devices.find(f".//printer[@model='{model}']")
+    if model not in _printers:
+        msg = f"Unknown printer model {model!r}"
+        raise KeyError(msg)
 
-    device = Device(
-        model=b"",
-        key=b"",
-        counters=[],
-        reset={},
-    )
+    printer_el = _printers[model]
+
+    factory = b""
+    key = b""
+    counters: list[Counter] = []
+    reset: dict[int, int] = {}
+    bulk_reset = False
 
     for spec in printer_el.attrib.get("specs", "").split(","):
-        spec_el: Element = devices.find(f".//devices/{spec}")
+        spec_el = _specs[spec]
+
+        if spec_el.attrib.get("bulk_reset") == "true":
+            bulk_reset = True
 
         service_el = spec_el.find(".//service")
         if service_el is not None:
             factory_el = service_el.find(".//factory")
-            device.model = bytes(int(byte, 0) for byte in factory_el.text.split())
+            factory = bytes(int(byte, 0) for byte in factory_el.text.split())
 
             keyword_el = service_el.find(".//keyword")
             if keyword_el is not None:
-                device.key = bytes(int(byte, 0) for byte in keyword_el.text.split())
+                key = bytes(int(byte, 0) for byte in keyword_el.text.split())
 
         waste_el = spec_el.find(".//waste")
         if waste_el is not None:
             query_el = waste_el.find(".//query")
             if query_el is not None:
                 for counter_el in query_el.findall(".//counter"):
-                    counter = Counter(addresses=[], max=0)
-
                     entry_el = counter_el.find(".//entry")
                     raw_addresses = entry_el.text if entry_el is not None else counter_el.text
 
-                    counter.addresses = [int(raw, 0) for raw in raw_addresses.split()]
-
                     max_el = counter_el.find(".//max")
-                    counter.max = int(max_el.text if max_el is not None else 0)
 
-                    device.counters.append(counter)
+                    counters.append(
+                        Counter(
+                            addresses=tuple(int(raw, 0) for raw in raw_addresses.split()),
+                            max=int(max_el.text if max_el is not None else 0),
+                        ),
+                    )
 
             reset_el = waste_el.find(".//reset")
             if reset_el is not None:
-                device.reset = {int(addr, 0): int(val, 0) for (addr, val) in batched(reset_el.text.split(), 2)}
-
-    return device
+                reset = {int(addr, 0): int(val, 0) for (addr, val) in batched(reset_el.text.split(), 2)}
+
+    return Device(
+        model=factory,
+        key=key,
+        counters=tuple(counters),
+        reset=MappingProxyType(reset),
+        bulk_reset=bulk_reset,
+    )
@@ -1,5 +1,4 @@
 import logging
-from time import sleep
 from types import TracebackType
 from typing import Self
 
@@ -31,14 +30,21 @@ class END4ControlBackend(ControlBackend):
             msg = "BiDi device is closed"
             raise BackendError(msg)
 
+        self._identifier: str | None = None
+
     def __enter__(self) -> Self:
         identifier = parse_identifier(self.identify())
         self.transport.write(ExitPacketMode2)
 
         dds = int(identifier["DDS"], base=16)
+        padding = b"\x11" * 0x8000
         while dds > 0:
-            self.transport.write(b"\x11" * 0x8000)
-            dds -= 0x8000
+            self.transport.write(padding)
+            dds -= len(padding)
+
+        # drain once up front rather than before every command, where waiting for an empty pipe costs each command a
+        # read timeout
+        self.transport.drain()
 
         return self
 
@@ -48,11 +54,11 @@ class END4ControlBackend(ControlBackend):
         exc_val: BaseException | None,
         exc_tb: TracebackType | None,
     ) -> bool:
+        self._identifier = None
+
         return False
 
     def send(self, command: bytes) -> bytes:
-        self.transport.drain()
-
         self.transport.write(
             b"END4"
             b"\x02\x01\x00\x00\x00"
@@ -64,18 +70,24 @@ class END4ControlBackend(ControlBackend):
             + command,
         )
 
-        response = b""
+        # transport reads return exactly the size asked for, so fill a header, skipping anything received ahead of it
+        response = bytearray(self.transport.read(10))
         while not response.startswith(b"END4"):
-            response = self.transport.read(1024)
-            sleep(0.1)
+            start = response.find(b"END4")
+            # drop everything ahead of the header, or if there's none yet, all but a tail that may hold its start
+            del response[: start if start > 0 else -3]
+            response += self.transport.read(10 - len(response))
 
-        expected_len = int.from_bytes(response[9:10], "big")
+        expected_len = response[9]
 
-        if len(response) != expected_len:
-            msg = "Received incomplete packet."
+        if expected_len < 10:
+            msg = "Received END4 packet shorter than its header."
             raise BackendError(msg)
 
-        return response[10:]
+        return self.transport.read(expected_len - 10)
 
     def identify(self) -> str:
-        return self.transport.identify()
+        if self._identifier is None:
+            self._identifier = self.transport.identify()
+
+        return self._identifier
@@ -1,8 +1,26 @@
-from collections.abc import Iterable
+from collections.abc import Generator, Iterable
 
 from .control import ControlBackend
 from .devices import Device
 from .status import Status
+from .utils import parse_identifier
+
+
+def contiguous_runs(addresses: Iterable[int], max_size: int) -> Generator[tuple[int, int], None, None]:
+    """Group addresses into `(start, size)` runs of consecutive addresses, each at most `max_size` long."""
+    start = size = 0
+    for address in addresses:
+        if size and address == start + size and size < max_size:
+            size += 1
+            continue
+
+        if size:
+            yield start, size
+
+        start, size = address, 1
+
+    if size:
+        yield start, size
 
 
 class Printer:
@@ -10,6 +28,10 @@ class Printer:
         self.device = device
 
         self._control = control_backend
+        self._identifier: dict[str, str] | None = None
+
+        # cleared once the printer rejects a range read, so later reads go straight to single bytes
+        self._range_reads = True
 
     def send_command(self, command: bytes, payload: bytes) -> bytes:
         return self._control.send(
@@ -32,7 +54,7 @@ class Printer:
             msg = f"Unknown response {response} for command {expected}"
             raise ValueError(msg)
 
-        payload = response[len(expected) :]
+        payload = memoryview(response)[len(expected) :]
 
         return Status.from_bytes(payload)
 
@@ -57,8 +79,40 @@ class Printer:
 
         return self.send_factory_command(self.device.model, action, payload)
 
+    def write_eeprom_multiple(self, values: Iterable[tuple[int, int]]) -> bytes:
+        action = 0x44
+        payload = (
+            b"".join(address.to_bytes(2, "little") + value.to_bytes(1, "little") for address, value in values)
+            + self.device.key
+        )
+
+        return self.send_factory_command(self.device.model, action, payload)
+
     def read_eeprom_multiple(self, addresses: Iterable[int]) -> bytes:
-        return bytes([self.read_eeprom(address) for address in addresses])
+        return self.read_eeprom_bulk(addresses)
+
+    def read_eeprom_bulk(self, addresses: Iterable[int]) -> bytes:
+        """Read the given addresses, coalescing consecutive ones into a single range read.
+
+        Single addresses, and runs the printer refuses (or truncates) as a range read, are read one byte at a time
+        instead. After the first refused range read, range reads are not attempted again.
+        """
+        data = bytearray()
+
+        for start, size in contiguous_runs(addresses, 0xFF):
+            chunk = b""
+            if size > 1 and self._range_reads:
+                try:
+                    chunk = self.read_eeprom_range(start, size)
+                except ValueError:
+                    self._range_reads = False
+
+            if len(chunk) != size:
+                chunk = bytes(self.read_eeprom(address) for address in range(start, start + size))
+
+            data += chunk
+
+        return bytes(data)
 
     def read_eeprom_range(self, address: int, size: int) -> bytes:
         action = 0x51
@@ -76,9 +130,10 @@ class Printer:
         return bytes.fromhex(response[16 : 16 + size * 2].decode("ascii"))
 
     def identify(self) -> dict[str, str]:
-        fields = (self._control.identify()).split(";")
+        if self._identifier is None:
+            self._identifier = parse_identifier(self._control.identify())
 
-        return dict(e.split(":") for e in fields if e)
+        return self._identifier
 
     def get_serial(self) -> str:
         return (self.get_status()).serial
@@ -86,13 +141,17 @@ class Printer:
     def get_waste(self) -> list[tuple[int, int]]:
         return [
             (
-                int.from_bytes(self.read_eeprom_multiple(counter.addresses), "little"),
+                int.from_bytes(self.read_eeprom_bulk(counter.addresses), "little"),
                 counter.max,
             )
             for counter in self.device.counters
         ]
 
     def reset_waste(self) -> None:
+        if self.device.bulk_reset:
+            self.write_eeprom_multiple(self.device.reset.items())
+            return
+
         for addr, value in self.device.reset.items():
             self.write_eeprom(addr, value)
 
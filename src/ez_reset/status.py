@@ -13,7 +13,7 @@ from typing import TYPE_CHECKING, Any, Self
 if TYPE_CHECKING:
     from collections.abc import Iterable
 
-from .utils import parse_status_struct
+from .utils import parse_status_entries
 
 
 class PrinterState(Enum):
@@ -91,7 +91,7 @@ class ConsumableStatus(Enum):
     UNKNOWN = 4
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ConsumableLevel:
     level: int
     status: ConsumableStatus
@@ -99,19 +99,23 @@ class ConsumableLevel:
     @classmethod
     def from_int(cls, level: int) -> ConsumableLevel:
         """Parse level and status information from a raw level value."""
-        if level == 110:
-            return cls(-1, ConsumableStatus.MISSING)
+        if 0 <= level < len(_LEVEL_TABLE):
+            return _LEVEL_TABLE[level]
 
-        if level == 105:
-            return cls(-1, ConsumableStatus.UNKNOWN)
+        return _FAIL
 
-        if level < 0 or level > 100:
-            return cls(-1, ConsumableStatus.FAIL)
 
-        if level == 0:
-            return cls(level, ConsumableStatus.EMPTY)
+# Raw levels are a single byte, so every possible value is classified up front
+_MISSING = ConsumableLevel(-1, ConsumableStatus.MISSING)
+_UNKNOWN = ConsumableLevel(-1, ConsumableStatus.UNKNOWN)
+_FAIL = ConsumableLevel(-1, ConsumableStatus.FAIL)
 
-        return cls(level, ConsumableStatus.OKAY)
+_LEVEL_TABLE = [_FAIL] * 0x100
+_LEVEL_TABLE[0] = ConsumableLevel(0, ConsumableStatus.EMPTY)
+for _level in range(1, 101):
+    _LEVEL_TABLE[_level] = ConsumableLevel(_level, ConsumableStatus.OKAY)
+_LEVEL_TABLE[105] = _UNKNOWN
+_LEVEL_TABLE[110] = _MISSING
 
 
 class InkColor(Enum):
@@ -137,12 +141,12 @@ class InkColor(Enum):
         return cls.UNKNOWN
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class InkLevel(ConsumableLevel):
     color: InkColor
 
     @classmethod
-    def from_bytes(cls, entry: bytes) -> InkLevel:
+    def from_bytes(cls, entry: bytes | memoryview) -> InkLevel:
         """Parse an ink entry from an ink level field."""
         color = InkColor(entry[1])
 
@@ -151,7 +155,7 @@ class InkLevel(ConsumableLevel):
         return cls(consumable_level.level, consumable_level.status, color)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Status:
     state: PrinterState
     error: PrinterError
@@ -162,16 +166,16 @@ class Status:
     other: dict[int, bytes]
 
     @classmethod
-    def from_bytes(cls, data: bytes) -> Status:
+    def from_bytes(cls, data: bytes | memoryview) -> Status:
         status = PrinterState.IDLE
         error = PrinterError.NONE
         source: PaperPath = PaperPath.UNKNOWN
         levels: Iterable[InkLevel] = []
-        maintenance_box = ConsumableLevel(-1, ConsumableStatus.UNKNOWN)
+        maintenance_box = _UNKNOWN
         serial = ""
         other: dict[int, bytes] = {}
 
-        for header, _parameter_length, parameter_data in parse_status_struct(data):
+        for header, _parameter_length, parameter_data in parse_status_entries(data):
             # Status entry
             if header == 0x01:
                 status = PrinterState(parameter_data[0])
@@ -198,10 +202,10 @@ class Status:
                 ]
 
             elif header == 0x40:
-                serial = str(parameter_data)
+                serial = bytes(parameter_data).decode("ascii", "replace")
 
             else:
-                other[header] = parameter_data
+                other[header] = bytes(parameter_data)
 
         return Status(status, error, source, levels, maintenance_box, serial, other)
 
@@ -213,6 +217,6 @@ class Status:
         yield (
             "maintenance_box",
             self.maintenance_box,
-            ConsumableLevel(level=-1, status=ConsumableStatus.UNKNOWN),
+            _UNKNOWN,
         )
         yield "serial", self.serial
@@ -3,6 +3,8 @@ from types import TracebackType
 
 
 class Transport(typing.Protocol):
+    __slots__ = ()
+
     closed: bool
 
     def __enter__(self) -> typing.Self: ...
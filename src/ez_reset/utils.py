@@ -1,34 +1,60 @@
-from collections.abc import Generator
+import struct
+from collections.abc import Generator, Iterable
 
+_LENGTH = struct.Struct("<H")
+_ENTRY_HEADER = struct.Struct("BB")
 
-def parse_status_struct(data: bytes) -> Generator[tuple[int, int, bytes], None, None]:
-    """Return a generator that iterates over a binary status struct's entries."""
-    length = int.from_bytes(data[0:2], "little")
 
-    if len(data) != length + 2:
+def parse_status_entries(data: bytes | memoryview) -> list[tuple[int, int, memoryview]]:
+    """Parse a binary status struct into a list of its entries.
+
+    Entry payloads are zero-copy views into `data`.
+    """
+    view = memoryview(data)
+    length = len(view) - 2
+
+    if length < 0 or _LENGTH.unpack_from(view, 0)[0] != length:
         msg = "Status payload length invalid"
         raise ValueError(msg)
 
+    entries: list[tuple[int, int, memoryview]] = []
+    append = entries.append
+    unpack_header = _ENTRY_HEADER.unpack_from
+
     # The status object contains various fields of interest, which are comprised of:
     # header  - 1 byte
     # size    - 1 byte
     # payload - n bytes
     index = 2
     while index < length:
-        header = data[index]
-        index += 1
-
-        parameter_length = data[index]
-        index += 1
+        header, parameter_length = unpack_header(view, index)
+        index += 2
 
-        parameter_data = data[index : index + parameter_length]
+        append((header, parameter_length, view[index : index + parameter_length]))
         index += parameter_length
 
-        yield header, parameter_length, parameter_data
+    return entries
+
+
+def parse_status_struct(data: bytes | memoryview) -> Generator[tuple[int, int, memoryview], None, None]:
+    """Return a generator that iterates over a binary status struct's entries."""
+    yield from parse_status_entries(data)
 
 
 def parse_identifier(identifier: str) -> dict[str, str]:
     """Parse an IEEE 1284.4 ID string."""
-    fields = identifier.split(";")
+    fields: dict[str, str] = {}
+
+    for field in identifier.split(";"):
+        if field:
+            key, _, value = field.partition(":")
+            fields[key] = value
+
+    return fields
+
+
+def parse_identifiers(identifiers: Iterable[str]) -> list[dict[str, str]]:
+    """Parse several IEEE 1284.4 ID strings, eg. one per enumerated printer."""
+    parse = parse_identifier
 
-    return dict(e.split(":") for e in fields if e)
+    return [parse(identifier) for identifier in identifiers]
@@ -1,39 +1,75 @@
+import contextlib
 import logging
 import time
+from collections import deque
 from types import TracebackType
 from typing import Self
 
+import pywintypes
+from win32event import WAIT_TIMEOUT, CreateEvent, WaitForSingleObject
 from win32file import (
     FILE_FLAG_NO_BUFFERING,
+    FILE_FLAG_OVERLAPPED,
     FILE_FLAG_WRITE_THROUGH,
     FILE_SHARE_READ,
     FILE_SHARE_WRITE,
     GENERIC_READ,
     GENERIC_WRITE,
     OPEN_EXISTING,
+    AllocateReadBuffer,
     CreateFileW,
     DeviceIoControl,
+    GetOverlappedResult,
     ReadFile,
     WriteFile,
 )
 
 from ez_reset.transport import Transport
 
-from .winapi import IOCTL_USBPRINT_GET_1284_ID, IOCTL_USBPRINT_SOFT_RESET
+from .winapi import (
+    ERROR_OPERATION_ABORTED,
+    IOCTL_USBPRINT_GET_1284_ID,
+    IOCTL_USBPRINT_SOFT_RESET,
+    CancelIoEx,
+)
 
 logger = logging.getLogger(__name__)
 
 
+# Reads are posted ahead of time at this size rather than at the size a caller asks for: a bulk-IN read completes at the
+# first short packet, so one read returns whatever the device has queued however large it is. Keep it a multiple of the
+# 512-byte bulk packet size.
 MAX_TRANSFER_SIZE = 0x400000
+MAX_IOCTL_SIZE = 1024
+
+# number of bulk-IN reads kept in flight, so the next transfer is already queued while one is being consumed
+READ_SLOTS = 3
+
+# how long drain() waits for an outstanding read before treating the pipe as empty
+DRAIN_TIMEOUT_MS = 50
+
+
+def _overlapped() -> pywintypes.OVERLAPPED:
+    overlapped = pywintypes.OVERLAPPED()
+    overlapped.hEvent = CreateEvent(None, True, False, None)  # noqa: FBT003
+
+    return overlapped
 
 
 class USBPRINTTransport(Transport):
+    __slots__ = ("_buffer", "_ioctl_buffer", "_overlapped", "_reads", "closed", "handle", "path")
+
     def __init__(self, path: str) -> None:
         self.path = path
         self.handle = None
         self.closed = True
 
-        self._buffer = b""
+        self._buffer = bytearray()
+
+        # outstanding reads, oldest first
+        self._reads: deque[tuple[pywintypes.OVERLAPPED, memoryview]] = deque()
+        self._overlapped: pywintypes.OVERLAPPED | None = None
+        self._ioctl_buffer: memoryview | None = None
 
     def __enter__(self) -> Self:
         logger.debug("CreateFileW(%s)", self.path)
@@ -43,19 +79,27 @@ class USBPRINTTransport(Transport):
             FILE_SHARE_READ | FILE_SHARE_WRITE,
             None,
             OPEN_EXISTING,
-            FILE_FLAG_NO_BUFFERING | FILE_FLAG_WRITE_THROUGH,
+            FILE_FLAG_OVERLAPPED | FILE_FLAG_NO_BUFFERING | FILE_FLAG_WRITE_THROUGH,
             None,
         )
 
         logger.debug("    Opened %s on handle %d", self.path, self.handle.handle)
 
+        # used for the synchronous-style writes and ioctls, which are waited on before returning
+        self._overlapped = _overlapped()
+        self._ioctl_buffer = memoryview(AllocateReadBuffer(MAX_IOCTL_SIZE))
+
         logger.debug(
-            "DeviceIoControl(%d, IOCTL_USBPRINT_SOFT_RESET, NULL, 1024)",
+            "DeviceIoControl(%d, IOCTL_USBPRINT_SOFT_RESET, NULL, %d)",
             self.handle.handle,
+            MAX_IOCTL_SIZE,
         )
-        DeviceIoControl(self.handle, IOCTL_USBPRINT_SOFT_RESET, None, 1024)
+        self._ioctl(IOCTL_USBPRINT_SOFT_RESET)
         logger.debug("    Issued soft reset to %d", self.handle.handle)
 
+        for _ in range(READ_SLOTS):
+            self._post_read(_overlapped(), memoryview(AllocateReadBuffer(MAX_TRANSFER_SIZE)))
+
         self.closed = False
 
         return self
@@ -67,50 +111,125 @@ class USBPRINTTransport(Transport):
         exc_tb: TracebackType | None,
     ) -> bool:
         logger.debug("Closing...")
+
+        # the kernel owns the buffers of in-flight reads until they complete, so wait for the cancellations. Reads are
+        # re-posted by whichever thread completes them, so use CancelIoEx; CancelIo only reaches the calling thread's
+        CancelIoEx(self.handle.handle, None)
+        for overlapped, _buffer in self._reads:
+            with contextlib.suppress(pywintypes.error):
+                GetOverlappedResult(self.handle, overlapped, True)  # noqa: FBT003
+        self._reads.clear()
+
         self.handle.close()
         self.closed = True
 
         return False
 
+    def _post_read(self, overlapped: pywintypes.OVERLAPPED, buffer: memoryview) -> None:
+        ReadFile(self.handle, buffer, overlapped)
+        self._reads.append((overlapped, buffer))
+
+    def _complete_read(self, *, keep: bool = True) -> int:
+        """Wait for the oldest outstanding read, buffer its data and queue the read again."""
+        handle = self.handle
+        reads = self._reads
+
+        overlapped, buffer = reads.popleft()
+        try:
+            size = GetOverlappedResult(handle, overlapped, True)  # noqa: FBT003
+        except pywintypes.error as e:
+            # a failed read is no longer in flight, so post it again or the slot is lost for good
+            self._post_read(overlapped, buffer)
+
+            # reads are cancelled when the thread that posted them exits; nothing was transferred, so carry on
+            if e.winerror == ERROR_OPERATION_ABORTED:
+                return 0
+
+            raise
+
+        if keep:
+            self._buffer.extend(buffer[:size])
+
+        ReadFile(handle, buffer, overlapped)
+        reads.append((overlapped, buffer))
+
+        return size
+
+    def _ioctl(self, code: int) -> memoryview:
+        """Issue an ioctl, returning a view of its output that is only valid until the next ioctl."""
+        DeviceIoControl(self.handle, code, None, self._ioctl_buffer, self._overlapped)
+        returned = GetOverlappedResult(self.handle, self._overlapped, True)  # noqa: FBT003
+
+        return self._ioctl_buffer[:returned]
+
     def write(self, data: bytes) -> None:
         if self.closed:
             msg = f"Handle to USBPRINT device {self.path} is closed"
             raise OSError(msg)
 
-        if logger.isEnabledFor(logging.DEBUG):
-            logger.debug("WriteFile(%s)", data[:32])
-            if len(data) > 32:
-                logger.debug("    Above call was truncated")
-
-        _status, bytes_written = WriteFile(self.handle, data)
+        handle = self.handle
+        overlapped = self._overlapped
 
-        assert bytes_written == len(data)
+        WriteFile(handle, data, overlapped)
+        bytes_written = GetOverlappedResult(handle, overlapped, True)  # noqa: FBT003
 
         if logger.isEnabledFor(logging.DEBUG):
-            logger.debug("    Wrote %d bytes to %d", bytes_written, self.handle)
+            logger.debug(
+                "WriteFile(%s)%s\n    Wrote %d bytes to %d",
+                bytes(data[:32]),
+                " [truncated]" if len(data) > 32 else "",
+                bytes_written,
+                self.handle,
+            )
+
+        if bytes_written != len(data):
+            msg = f"Short write to USBPRINT device {self.path}: {bytes_written} of {len(data)} bytes"
+            raise OSError(msg)
 
     def read(self, size: int) -> bytes:
         if self.closed:
             msg = f"Handle to USBPRINT device {self.path} is closed"
             raise OSError(msg)
 
-        while len(self._buffer) < size:
-            _status, data = ReadFile(self.handle, MAX_TRANSFER_SIZE)
-            self._buffer += data
+        buffer = self._buffer
+
+        # a single large completion often covers several of the small reads D4 makes, so skip straight to slicing
+        if len(buffer) >= size:
+            read = bytes(buffer[:size])
+            del buffer[:size]
+
+            return read
+
+        complete_read = self._complete_read
 
-            if len(self._buffer) < size:
-                time.sleep(0.01)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("read(%d) with %d bytes buffered", size, len(buffer))
+
+        while len(buffer) < size:
+            # an empty completion means the device had nothing to send; don't spin re-posting reads
+            if not complete_read():
+                time.sleep(0.001)
 
-        read = self._buffer[:size]
-        self._buffer = self._buffer[size:]
+        read = bytes(buffer[:size])
+        del buffer[:size]
 
         return read
 
     def drain(self) -> None:
-        remaining = True
-        while remaining:
-            _status, data = ReadFile(self.handle, MAX_TRANSFER_SIZE)
-            remaining = len(data) != 0
+        # reads queued before the pipe ran dry may still pick up stale data, so keep going until every slot has come
+        # back empty in a row. A read that stays pending for DRAIN_TIMEOUT_MS only means nothing is queued right now;
+        # anything the device sends afterwards is left for the next read
+        reads = self._reads
+        complete_read = self._complete_read
+
+        empty = 0
+        while empty < READ_SLOTS:
+            overlapped, _buffer = reads[0]
+            if WaitForSingleObject(overlapped.hEvent, DRAIN_TIMEOUT_MS) == WAIT_TIMEOUT:
+                return
+
+            empty = 0 if complete_read(keep=False) else empty + 1
 
     def identify(self) -> str:
-        return DeviceIoControl(self.handle, IOCTL_USBPRINT_GET_1284_ID, None, 1024)[2:].decode("ascii")
+        # skip the 2-byte length prefix; IEEE 1284 IDs are ASCII, and latin-1 decodes them without validation
+        return str(self._ioctl(IOCTL_USBPRINT_GET_1284_ID)[2:], "latin-1")
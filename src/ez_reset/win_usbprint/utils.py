@@ -1,6 +1,6 @@
 import ctypes
 from collections.abc import Generator
-from ctypes.wintypes import DWORD
+from ctypes.wintypes import DWORD, WCHAR
 
 from .winapi import (
     DIGCF_DEVICEINTERFACE,
@@ -18,64 +18,84 @@ from .winapi import (
     SetupDiGetDeviceInterfaceDetail,
 )
 
+# room for the device path in the detail structure; enough for any USB printer path seen in practice, and grown on
+# demand otherwise
+DEVICE_PATH_LENGTH = 512
+
+
+def _device_interface_detail(size: int) -> SP_DEVICE_INTERFACE_DETAIL_DATA:
+    """Lay a detail structure over a raw buffer of `size` bytes, leaving room for the variable-length path."""
+    device_interface_detail = SP_DEVICE_INTERFACE_DETAIL_DATA.from_buffer((ctypes.c_byte * size)())
+    device_interface_detail.cb_size = ctypes.sizeof(SP_DEVICE_INTERFACE_DETAIL_DATA)
+
+    return device_interface_detail
+
 
 def enumerate_printers() -> Generator[str, None, None]:
+    guid_ref = ctypes.byref(GUID_DEVINTERFACE_USBPRINT)
+
     devices_handle = SetupDiGetClassDevs(
-        ctypes.byref(GUID_DEVINTERFACE_USBPRINT),
+        guid_ref,
         None,
         NULL,
         DIGCF_PRESENT | DIGCF_DEVICEINTERFACE,
     )
 
+    # the same structures are reused for every device; the APIs overwrite them on each call
+    device_interface = SP_DEVICE_INTERFACE_DATA()
+    device_interface.cb_size = ctypes.sizeof(SP_DEVICE_INTERFACE_DATA)
+    device_interface_ref = ctypes.byref(device_interface)
+
+    dev_info = SP_DEVINFO_DATA()
+    dev_info.cb_size = ctypes.sizeof(SP_DEVINFO_DATA)
+    dev_info_ref = ctypes.byref(dev_info)
+
+    size = DWORD(0)
+    size_ref = ctypes.byref(size)
+
+    detail_size = ctypes.sizeof(DWORD) + DEVICE_PATH_LENGTH * ctypes.sizeof(WCHAR)
+    device_interface_detail = _device_interface_detail(detail_size)
+
     idx = 0
     while True:
-        device_interface = SP_DEVICE_INTERFACE_DATA()
-        device_interface.cb_size = ctypes.sizeof(device_interface)
-
         if not SetupDiEnumDeviceInterfaces(
             devices_handle,
             None,
-            ctypes.byref(GUID_DEVINTERFACE_USBPRINT),
+            guid_ref,
             idx,
-            ctypes.byref(device_interface),
+            device_interface_ref,
         ):
             if ctypes.GetLastError() != ERROR_NO_MORE_ITEMS:
                 raise ctypes.WinError()
 
             break
 
-        size = DWORD(0)
-        # get the size
         if not SetupDiGetDeviceInterfaceDetail(
             devices_handle,
-            ctypes.byref(device_interface),
-            None,
-            0,
-            ctypes.byref(size),
-            None,
+            device_interface_ref,
+            ctypes.byref(device_interface_detail),
+            detail_size,
+            size_ref,
+            dev_info_ref,
         ):
-            # Ignore ERROR_INSUFFICIENT_BUFFER
             if ctypes.GetLastError() != ERROR_INSUFFICIENT_BUFFER:
                 raise ctypes.WinError()
 
-        dev_info = SP_DEVINFO_DATA()
-        dev_info.cb_size = ctypes.sizeof(dev_info)
+            # the path did not fit, grow to the reported size and retry
+            detail_size = size.value
+            device_interface_detail = _device_interface_detail(detail_size)
 
-        device_interface_detail = SP_DEVICE_INTERFACE_DETAIL_DATA()
-        device_interface_detail.cb_size = ctypes.sizeof(SP_DEVICE_INTERFACE_DETAIL_DATA)
-        ctypes.resize(device_interface_detail, size.value)
-
-        if not SetupDiGetDeviceInterfaceDetail(
-            devices_handle,
-            ctypes.byref(device_interface),
-            ctypes.byref(device_interface_detail),
-            size,
-            None,
-            ctypes.byref(dev_info),
-        ):
-            raise ctypes.WinError()
+            if not SetupDiGetDeviceInterfaceDetail(
+                devices_handle,
+                device_interface_ref,
+                ctypes.byref(device_interface_detail),
+                size,
+                None,
+                dev_info_ref,
+            ):
+                raise ctypes.WinError()
 
-        path = str(device_interface_detail.get_string())
+        path = device_interface_detail.get_string(detail_size)
 
         yield path
 
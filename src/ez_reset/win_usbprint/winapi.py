@@ -72,13 +72,8 @@ class GUID(ctypes.Structure):
     _fields_ = (("data1", DWORD), ("data2", WORD), ("data3", WORD), ("data4", BYTE * 8))
 
     def __str__(self) -> str:
-        return "{{{:08x}-{:04x}-{:04x}-{}-{}}}".format(
-            self.data1,
-            self.data2,
-            self.data3,
-            "".join([f"{d:02x}" for d in self.Data4[:2]]),
-            "".join([f"{d:02x}" for d in self.Data4[2:]]),
-        )
+        data4 = bytes(self.data4).hex()
+        return f"{{{self.data1:08x}-{self.data2:04x}-{self.data3:04x}-{data4[:4]}-{data4[4:]}}}"
 
 
 class SP_DEVINFO_DATA(ctypes.Structure):
@@ -99,7 +94,7 @@ class SP_DEVINFO_DATA(ctypes.Structure):
     )
 
     def __str__(self) -> str:
-        return f"<SP_DEVINFO_DATA ClassGuid:{self.ClassGuid} DevInst:{self.DevInst}>"
+        return f"<SP_DEVINFO_DATA ClassGuid:{self.class_guid} DevInst:{self.dev_inst}>"
 
 
 class SP_DEVICE_INTERFACE_DATA(ctypes.Structure):
@@ -136,9 +131,10 @@ class SP_DEVICE_INTERFACE_DETAIL_DATA(ctypes.Structure):
         ("device_path", TCHAR * ANYSIZE_ARRAY),  # device_path[1]
     )
 
-    def get_string(self) -> str:
-        """Retreive stored string."""
-        return ctypes.wstring_at(ctypes.byref(self, ctypes.sizeof(DWORD)))
+    def get_string(self, size: int) -> str:
+        """Retreive stored string, given the size in bytes of the buffer backing the structure."""
+        length = (size - ctypes.sizeof(DWORD)) // ctypes.sizeof(WCHAR)
+        return (WCHAR * length).from_address(ctypes.addressof(self) + ctypes.sizeof(DWORD)).value
 
 
 setup_api = ctypes.windll.setupapi
@@ -194,6 +190,16 @@ SetupDiGetDeviceRegistryProperty.argtypes = [
     ctypes.POINTER(DWORD),  # __out_opt  PDWORD RequiredSize
 ]
 
+kernel32 = ctypes.windll.kernel32
+
+# not wrapped by pywin32; unlike CancelIo it also cancels I/O issued by other threads
+CancelIoEx = kernel32.CancelIoEx
+CancelIoEx.restype = BOOL
+CancelIoEx.argtypes = [
+    HANDLE,  # _In_      HANDLE hFile,
+    ctypes.c_void_p,  # _In_opt_  LPOVERLAPPED lpOverlapped
+]
+
 GUID_DEVINTERFACE_USBPRINT = GUID(
     0x28D78FAD,
     0x5A12,
@@ -210,6 +216,7 @@ SPDRP_HARDWAREID = 1
 SPDRP_FRIENDLYNAME = 12
 SPDRP_LOCATION_INFORMATION = 13
 ERROR_NO_MORE_ITEMS = 259
+ERROR_OPERATION_ABORTED = 995
 
 IOCTL_USBPRINT_GET_1284_ID = 2228276
 IOCTL_USBPRINT_SOFT_RESET = 2228288